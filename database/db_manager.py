@@ -1,21 +1,73 @@
 import sqlite3
 import json
 import logging
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime
+import queue
+import threading
+from typing import List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Compact encoder for the players/votes JSON columns (no padding, raw UTF-8)
+dump_json = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection that goes back to its pool on close()."""
+    pool = None
+    
+    def close(self):
+        if self.pool is not None and self.pool.release(self):
+            return
+        super().close()
+
+class ConnectionPool:
+    """Small pool of reusable SQLite connections for one database file."""
+    
+    def __init__(self, db_path: str, max_size: int = 5):
+        self.db_path = db_path
+        self.idle = queue.LifoQueue(maxsize=max_size)
+    
+    def acquire(self) -> PooledConnection:
+        """Get an idle connection, opening a new one if none is free."""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(self.db_path, factory=PooledConnection, check_same_thread=False)
+            # WAL lets readers run alongside a writer and makes each commit an
+            # append instead of a rewrite; NORMAL sync is durable enough with WAL
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.pool = self
+            return conn
+    
+    def release(self, conn: PooledConnection) -> bool:
+        """Return a connection to the pool. Returns False if the pool is full."""
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self.idle.put_nowait(conn)
+            return True
+        except queue.Full:
+            return False
+
 class DatabaseManager:
+    # Connection pools shared by every manager using the same database file
+    _pools: Dict[str, ConnectionPool] = {}
+    _pools_lock = threading.Lock()
+    
     def __init__(self, db_path: str = 'data/spy_game.db'):
         self.db_path = db_path
         # Create data directory if it doesn't exist
         import os
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        
+        with self._pools_lock:
+            if db_path not in self._pools:
+                self._pools[db_path] = ConnectionPool(db_path)
+            self.pool = self._pools[db_path]
     
     def get_connection(self):
-        """Get database connection."""
-        return sqlite3.connect(self.db_path)
+        """Get a pooled database connection. close() returns it to the pool."""
+        return self.pool.acquire()
     
     def init_db(self):
         """Initialize database tables."""
@@ -76,6 +128,22 @@ class DatabaseManager:
                 )
             ''')
             
+            # Indexes for the hot lookups: active game per chat, leaderboard order
+            # and per-game participant updates
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_games_chat_status
+                ON games (chat_id, status, created_at)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_players_leaderboard
+                ON players (games_won DESC, games_played DESC)
+                WHERE games_played > 0
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_participants_game_user
+                ON game_participants (game_id, user_id)
+            ''')
+            
             conn.commit()
             logger.info("Database initialized successfully")
             
@@ -160,7 +228,7 @@ class DatabaseManager:
             # Update game with new players list
             cursor.execute('''
                 UPDATE games SET players = ? WHERE game_id = ?
-            ''', (json.dumps(players), game_id))
+            ''', (dump_json(players), game_id))
             
             if cursor.rowcount == 0:
                 logger.error(f"Failed to update game {game_id} with new player")
@@ -177,8 +245,8 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def start_game(self, game_id: str, spy_id: int, location: str) -> bool:
-        """Start the game with assigned spy and location."""
+    def start_game(self, game_id: str, spy_id: int, location: str, discussion_time: int) -> bool:
+        """Start the game with assigned spy and location (discussion_time in seconds)."""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -187,9 +255,9 @@ class DatabaseManager:
                 UPDATE games 
                 SET status = 'discussion', spy_id = ?, location = ?, 
                     started_at = CURRENT_TIMESTAMP,
-                    discussion_end = datetime(CURRENT_TIMESTAMP, '+5 minutes')
+                    discussion_end = datetime(CURRENT_TIMESTAMP, ?)
                 WHERE game_id = ?
-            ''', (spy_id, location, game_id))
+            ''', (spy_id, location, f'+{discussion_time} seconds', game_id))
             
             # Add participants to game_participants table
             cursor.execute('SELECT players FROM games WHERE game_id = ?', (game_id,))
@@ -240,7 +308,8 @@ class DatabaseManager:
                     'voting_end': result[8],
                     'winner': result[9]
                 }
-                logger.debug(f"Retrieved game {game_id}: {len(game_data['players'])} players")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Retrieved game {game_id}: {len(game_data['players'])} players")
                 return game_data
             
             logger.warning(f"Game {game_id} not found")
@@ -280,10 +349,12 @@ class DatabaseManager:
                     'voting_end': result[8],
                     'winner': result[9]
                 }
-                logger.debug(f"Retrieved active game for chat {chat_id}: {game_data['game_id']} with {len(game_data['players'])} players")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Retrieved active game for chat {chat_id}: {game_data['game_id']} with {len(game_data['players'])} players")
                 return game_data
             
-            logger.debug(f"No active game found for chat {chat_id}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"No active game found for chat {chat_id}")
             return None
             
         except Exception as e:
@@ -308,7 +379,7 @@ class DatabaseManager:
                 
                 cursor.execute('''
                     UPDATE games SET votes = ? WHERE game_id = ?
-                ''', (json.dumps(votes), game_id))
+                ''', (dump_json(votes), game_id))
                 
                 # Update game_participants
                 cursor.execute('''
@@ -329,8 +400,8 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def start_voting(self, game_id: str) -> bool:
-        """Start voting phase."""
+    def start_voting(self, game_id: str, voting_time: int) -> bool:
+        """Start voting phase (voting_time in seconds)."""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -338,9 +409,9 @@ class DatabaseManager:
             cursor.execute('''
                 UPDATE games 
                 SET status = 'voting',
-                    voting_end = datetime(CURRENT_TIMESTAMP, '+30 seconds')
+                    voting_end = datetime(CURRENT_TIMESTAMP, ?)
                 WHERE game_id = ?
-            ''', (game_id,))
+            ''', (f'+{voting_time} seconds', game_id))
             
             conn.commit()
             return True
@@ -380,7 +451,11 @@ class DatabaseManager:
                 for player in players:
                     user_id = player['user_id']
                     is_spy = user_id == spy_id
-                    won = (winner == 'spy' and is_spy) or (winner == 'civilians' and not is_spy)
+                    won = int(winner == ('spy' if is_spy else 'civilians'))
+                    
+                    # Look up this player's vote once
+                    vote = votes.get(str(user_id))
+                    voted = int(vote is not None)
                     
                     # Update stats
                     if is_spy:
@@ -393,7 +468,7 @@ class DatabaseManager:
                                 total_votes_cast = total_votes_cast + ?,
                                 last_played = CURRENT_TIMESTAMP
                             WHERE user_id = ?
-                        ''', (1 if won else 0, 1 if won else 0, 1 if str(user_id) in votes else 0, user_id))
+                        ''', (won, won, voted, user_id))
                     else:
                         cursor.execute('''
                             UPDATE players 
@@ -405,13 +480,7 @@ class DatabaseManager:
                                 correct_votes = correct_votes + ?,
                                 last_played = CURRENT_TIMESTAMP
                             WHERE user_id = ?
-                        ''', (
-                            1 if won else 0, 
-                            1 if won else 0, 
-                            1 if str(user_id) in votes else 0,
-                            1 if str(user_id) in votes and votes[str(user_id)] == spy_id else 0,
-                            user_id
-                        ))
+                        ''', (won, won, voted, int(vote == spy_id), user_id))
             
             conn.commit()
             return True
@@ -516,6 +585,26 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def get_stale_game_ids(self, waiting_max_age: int, running_max_age: int) -> List[str]:
+        """Get ids of active games left untouched for longer than the given ages (seconds)."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT game_id FROM games
+                WHERE (status = 'waiting' AND created_at < datetime('now', ?))
+                   OR (status IN ('discussion', 'voting') AND started_at < datetime('now', ?))
+            ''', (f'-{waiting_max_age} seconds', f'-{running_max_age} seconds'))
+            
+            return [row[0] for row in cursor.fetchall()]
+            
+        except Exception as e:
+            logger.error(f"Error getting stale games: {e}")
+            return []
+        finally:
+            conn.close()
+    
     def cancel_game(self, game_id: str) -> bool:
         """Cancel an active game."""
         conn = self.get_connection()
@@ -10,22 +10,30 @@ from database.db_manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+# All possible game locations (shared, never modified)
+LOCATIONS = (
+    "🏢 Airport", "🏦 Bank", "🏖️ Beach", "🎰 Casino", "⛪ Church", 
+    "🎬 Cinema", "🎪 Circus", "🏛️ Embassy", "🏥 Hospital", "🏨 Hotel",
+    "📚 Library", "🛍️ Mall", "🏛️ Museum", "🏢 Office", "🌳 Park",
+    "🍽️ Restaurant", "🏫 School", "🏟️ Stadium", "🚇 Subway", "🎭 Theater",
+    "🎓 University", "🦁 Zoo", "🏰 Castle", "⛲ Fountain", "🌉 Bridge",
+    "🚂 Train Station", "🚢 Port", "🏭 Factory", "🏪 Store", "🎨 Art Gallery"
+)
+
+# Phase lengths in seconds
+DISCUSSION_TIME = 300
+VOTING_TIME = 30
+
 class GameLogic:
     def __init__(self):
         self.db = DatabaseManager()
-        self.locations = [
-            "🏢 Airport", "🏦 Bank", "🏖️ Beach", "🎰 Casino", "⛪ Church", 
-            "🎬 Cinema", "🎪 Circus", "🏛️ Embassy", "🏥 Hospital", "🏨 Hotel",
-            "📚 Library", "🛍️ Mall", "🏛️ Museum", "🏢 Office", "🌳 Park",
-            "🍽️ Restaurant", "🏫 School", "🏟️ Stadium", "🚇 Subway", "🎭 Theater",
-            "🎓 University", "🦁 Zoo", "🏰 Castle", "⛲ Fountain", "🌉 Bridge",
-            "🚂 Train Station", "🚢 Port", "🏭 Factory", "🏪 Store", "🎨 Art Gallery"
-        ]
+        self.locations = LOCATIONS
         
         # Active games tracking
         self.active_games: Dict[str, dict] = {}
-        self.discussion_tasks: Dict[str, asyncio.Task] = {}
-        self.voting_tasks: Dict[str, asyncio.Task] = {}
+        
+        # Phase timers wait on these; setting one ends the phase early
+        self.phase_events: Dict[str, asyncio.Event] = {}
     
     def create_game(self, chat_id: int) -> Optional[str]:
         """Create a new game."""
@@ -81,8 +89,9 @@ class GameLogic:
         if success:
             # Update local tracking with fresh data from database
             updated_game = self.db.get_game(game_id)
-            if updated_game and game_id in self.active_games:
-                self.active_games[game_id]['players'] = updated_game['players']
+            local_game = self.active_games.get(game_id)
+            if updated_game and local_game is not None:
+                local_game['players'] = updated_game['players']
                 logger.info(f"Player {user_id} ({first_name}) joined game {game_id}. Total players: {len(updated_game['players'])}")
             else:
                 logger.error(f"Failed to update local tracking for game {game_id}")
@@ -91,10 +100,10 @@ class GameLogic:
         
         return success
     
-    def can_start_game(self, game_id: str) -> Tuple[bool, str]:
-        """Check if game can be started."""
-        # Always get fresh data from database for this check
-        game = self.db.get_game(game_id)
+    def can_start_game(self, game_id: str, game: Optional[Dict] = None) -> Tuple[bool, str]:
+        """Check if game can be started (using `game` if the caller just fetched it)."""
+        if game is None:
+            game = self.db.get_game(game_id)
         if not game:
             return False, "Game not found"
         
@@ -114,7 +123,7 @@ class GameLogic:
             logger.error(f"Game {game_id} not found when trying to start")
             return None
         
-        can_start, message = self.can_start_game(game_id)
+        can_start, message = self.can_start_game(game_id, game)
         if not can_start:
             logger.warning(f"Cannot start game {game_id}: {message}")
             return None
@@ -124,7 +133,7 @@ class GameLogic:
         location = random.choice(self.locations)
         
         # Start game in database
-        if self.db.start_game(game_id, spy['user_id'], location):
+        if self.db.start_game(game_id, spy['user_id'], location, DISCUSSION_TIME):
             # Update local tracking
             self.active_games[game_id] = {
                 'chat_id': game['chat_id'],
@@ -133,7 +142,8 @@ class GameLogic:
                 'spy_id': spy['user_id'],
                 'location': location,
                 'votes': {},
-                'discussion_end_time': datetime.now() + timedelta(minutes=5),
+                'expected_votes': len(game['players']),
+                'discussion_end_time': datetime.now() + timedelta(seconds=DISCUSSION_TIME),
                 'voting_end_time': None
             }
             
@@ -155,8 +165,9 @@ class GameLogic:
         game = self.db.get_game(game_id)
         if game:
             # Update local tracking if it exists
-            if game_id in self.active_games:
-                self.active_games[game_id].update({
+            local_game = self.active_games.get(game_id)
+            if local_game is not None:
+                local_game.update({
                     'players': game['players'],
                     'status': game['status'],
                     'votes': game['votes']
@@ -164,10 +175,8 @@ class GameLogic:
             return game
         
         # Fallback to local tracking if database fails
-        if game_id in self.active_games:
-            return self.active_games[game_id].copy()
-        
-        return None
+        local_game = self.active_games.get(game_id)
+        return local_game.copy() if local_game is not None else None
     
     def get_active_game_by_chat(self, chat_id: int) -> Optional[Dict]:
         """Get active game in chat."""
@@ -175,9 +184,9 @@ class GameLogic:
         game = self.db.get_active_game_by_chat(chat_id)
         if game:
             # Update local tracking if game exists
-            game_id = game['game_id']
-            if game_id in self.active_games:
-                self.active_games[game_id].update({
+            local_game = self.active_games.get(game['game_id'])
+            if local_game is not None:
+                local_game.update({
                     'players': game['players'],
                     'status': game['status'],
                     'votes': game['votes']
@@ -193,10 +202,11 @@ class GameLogic:
     
     def start_voting_phase(self, game_id: str) -> bool:
         """Start voting phase."""
-        if self.db.start_voting(game_id):
-            if game_id in self.active_games:
-                self.active_games[game_id]['status'] = 'voting'
-                self.active_games[game_id]['voting_end_time'] = datetime.now() + timedelta(seconds=30)
+        if self.db.start_voting(game_id, VOTING_TIME):
+            local_game = self.active_games.get(game_id)
+            if local_game is not None:
+                local_game['status'] = 'voting'
+                local_game['voting_end_time'] = datetime.now() + timedelta(seconds=VOTING_TIME)
             logger.info(f"Started voting phase for game {game_id}")
             return True
         
@@ -211,13 +221,15 @@ class GameLogic:
             logger.warning(f"Cannot cast vote in game {game_id}: game not found or not in voting phase (status: {game.get('status') if game else 'None'})")
             return False
 
+        player_ids = {p['user_id'] for p in game['players']}
+
         # Check if voter is in game
-        if not any(p['user_id'] == voter_id for p in game['players']):
+        if voter_id not in player_ids:
             logger.warning(f"Voter {voter_id} not in game {game_id}")
             return False
 
         # Check if voted player is in game
-        if not any(p['user_id'] == voted_for_id for p in game['players']):
+        if voted_for_id not in player_ids:
             logger.warning(f"Voted player {voted_for_id} not in game {game_id}")
             return False
 
@@ -230,10 +242,9 @@ class GameLogic:
         # Cast vote in database
         if self.db.cast_vote(game_id, voter_id, voted_for_id):
             # Update local tracking
-            if game_id in self.active_games:
-                if 'votes' not in self.active_games[game_id]:
-                    self.active_games[game_id]['votes'] = {}
-                self.active_games[game_id]['votes'][str(voter_id)] = voted_for_id
+            local_game = self.active_games.get(game_id)
+            if local_game is not None:
+                local_game.setdefault('votes', {})[str(voter_id)] = voted_for_id
             
             logger.info(f"Player {voter_id} voted for {voted_for_id} in game {game_id}")
             return True
@@ -243,14 +254,21 @@ class GameLogic:
     
     def check_all_voted(self, game_id: str) -> bool:
         """Check if all players have voted."""
-        game = self.get_game_info(game_id)
-        if not game:
-            return False
+        # Local tracking holds every vote cast through this instance, so only
+        # fall back to the database for games it doesn't know about
+        game = self.active_games.get(game_id)
+        if game is not None and game.get('expected_votes'):
+            total_players = game['expected_votes']
+        else:
+            game = self.get_game_info(game_id)
+            if not game:
+                return False
+            total_players = len(game['players'])
         
-        total_players = len(game['players'])
         votes_cast = len(game['votes'])
         
-        logger.debug(f"Game {game_id}: {votes_cast}/{total_players} votes cast")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Game {game_id}: {votes_cast}/{total_players} votes cast")
         return votes_cast >= total_players
     
     def calculate_results(self, game_id: str) -> Optional[Dict]:
@@ -260,6 +278,11 @@ class GameLogic:
             logger.error(f"Game {game_id} not found when calculating results")
             return None
         
+        # Results are final once recorded; never end (and count stats for) a game twice
+        if game['status'] != 'voting':
+            logger.warning(f"Game {game_id} is {game['status']}, not calculating results again")
+            return None
+        
         votes = game['votes']
         spy_id = game['spy_id']
         
@@ -267,14 +290,15 @@ class GameLogic:
             # No votes cast - spy wins
             winner = 'spy'
             eliminated_player_id = None
-            vote_counts = {}
+            ranked_votes = []
             logger.info(f"Game {game_id}: No votes cast, spy wins by default")
         else:
             # Count votes
             vote_counts = Counter(votes.values())
             
-            # Find player with most votes
-            eliminated_player_id = vote_counts.most_common(1)[0][0]
+            # Rank players by votes received (ties keep first-vote order)
+            ranked_votes = vote_counts.most_common()
+            eliminated_player_id = ranked_votes[0][0]
             
             # Determine winner
             if eliminated_player_id == spy_id:
@@ -288,47 +312,37 @@ class GameLogic:
         self.db.end_game(game_id, winner)
         
         # Update local tracking
-        if game_id in self.active_games:
-            self.active_games[game_id]['status'] = 'ended'
+        local_game = self.active_games.get(game_id)
+        if local_game is not None:
+            local_game['status'] = 'ended'
+        
+        players_by_id = {p['user_id']: p for p in game['players']}
         
         # Get eliminated player info
-        eliminated_player = None
-        if eliminated_player_id:
-            eliminated_player = next(
-                (p for p in game['players'] if p['user_id'] == eliminated_player_id), 
-                None
-            )
+        eliminated_player = players_by_id.get(eliminated_player_id) if eliminated_player_id else None
         
         # Get spy info
-        spy_player = next(
-            (p for p in game['players'] if p['user_id'] == spy_id), 
-            None
-        )
+        spy_player = players_by_id.get(spy_id)
         
         return {
             'winner': winner,
             'eliminated_player': eliminated_player,
             'spy_player': spy_player,
-            'vote_counts': dict(vote_counts),
+            # Ordered by votes received, highest first
+            'vote_counts': dict(ranked_votes),
             'total_votes': len(votes),
-            'location': game['location']
+            'location': game['location'],
+            'players': game['players']
         }
     
     def cancel_game(self, game_id: str) -> bool:
         """Cancel an active game."""
         if self.db.cancel_game(game_id):
             # Clean up local tracking
-            if game_id in self.active_games:
-                del self.active_games[game_id]
-            
-            # Cancel any running tasks
-            if game_id in self.discussion_tasks:
-                self.discussion_tasks[game_id].cancel()
-                del self.discussion_tasks[game_id]
+            self.active_games.pop(game_id, None)
             
-            if game_id in self.voting_tasks:
-                self.voting_tasks[game_id].cancel()
-                del self.voting_tasks[game_id]
+            # Stop any running phase timer
+            self.finish_phase(game_id)
             
             logger.info(f"Cancelled game {game_id}")
             return True
@@ -336,19 +350,53 @@ class GameLogic:
         logger.error(f"Failed to cancel game {game_id}")
         return False
     
+    def reap_stale_games(self, waiting_max_age: int = 3600, running_max_age: int = 7200) -> List[str]:
+        """Cancel abandoned games and drop them from memory. Returns their ids."""
+        reaped = [
+            game_id
+            for game_id in self.db.get_stale_game_ids(waiting_max_age, running_max_age)
+            if self.cancel_game(game_id)
+        ]
+        
+        if reaped:
+            logger.info(f"Reaped {len(reaped)} stale games")
+        
+        return reaped
+    
     def cleanup_game(self, game_id: str):
         """Clean up game from memory after completion."""
-        if game_id in self.active_games:
-            del self.active_games[game_id]
-        
-        if game_id in self.discussion_tasks:
-            del self.discussion_tasks[game_id]
+        self.active_games.pop(game_id, None)
         
-        if game_id in self.voting_tasks:
-            del self.voting_tasks[game_id]
+        self.finish_phase(game_id)
         
         logger.info(f"Cleaned up game {game_id}")
     
+    async def wait_for_phase(self, game_id: str, timeout: float) -> bool:
+        """Wait for a game phase to run out.
+        
+        Returns True if the timeout elapsed, False if the phase was finished
+        early through finish_phase().
+        """
+        # Wake any timer still waiting on a previous phase of this game
+        self.finish_phase(game_id)
+        
+        event = asyncio.Event()
+        self.phase_events[game_id] = event
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return False
+        except asyncio.TimeoutError:
+            return True
+        finally:
+            if self.phase_events.get(game_id) is event:
+                del self.phase_events[game_id]
+    
+    def finish_phase(self, game_id: str):
+        """Wake the running phase timer of a game so it exits without firing."""
+        event = self.phase_events.pop(game_id, None)
+        if event:
+            event.set()
+    
     def get_player_role_info(self, game_id: str, user_id: int) -> Optional[Dict]:
         """Get role-specific information for a player."""
         game = self.get_game_info(game_id)
@@ -365,7 +413,11 @@ class GameLogic:
     
     def get_voting_keyboard_data(self, game_id: str) -> List[Dict]:
         """Get data for voting keyboard."""
-        game = self.get_game_info(game_id)
+        # Players can't change once the game has started, so a started game's
+        # local tracking is enough; fall back to the database otherwise
+        game = self.active_games.get(game_id)
+        if not game or not game.get('expected_votes'):
+            game = self.get_game_info(game_id)
         if not game:
             return []
         
@@ -380,10 +432,10 @@ class GameLogic:
     
     def is_discussion_time_over(self, game_id: str) -> bool:
         """Check if discussion time is over."""
-        if game_id not in self.active_games:
+        game = self.active_games.get(game_id)
+        if game is None:
             return True
         
-        game = self.active_games[game_id]
         if game['status'] != 'discussion':
             return True
         
@@ -394,10 +446,10 @@ class GameLogic:
     
     def is_voting_time_over(self, game_id: str) -> bool:
         """Check if voting time is over."""
-        if game_id not in self.active_games:
+        game = self.active_games.get(game_id)
+        if game is None:
             return True
         
-        game = self.active_games[game_id]
         if game['status'] != 'voting':
             return True
         
@@ -408,10 +460,10 @@ class GameLogic:
     
     def get_remaining_discussion_time(self, game_id: str) -> int:
         """Get remaining discussion time in seconds."""
-        if game_id not in self.active_games:
+        game = self.active_games.get(game_id)
+        if game is None:
             return 0
         
-        game = self.active_games[game_id]
         if game['status'] != 'discussion' or not game['discussion_end_time']:
             return 0
         
@@ -420,10 +472,10 @@ class GameLogic:
     
     def get_remaining_voting_time(self, game_id: str) -> int:
         """Get remaining voting time in seconds."""
-        if game_id not in self.active_games:
+        game = self.active_games.get(game_id)
+        if game is None:
             return 0
         
-        game = self.active_games[game_id]
         if game['status'] != 'voting' or not game['voting_end_time']:
             return 0
         
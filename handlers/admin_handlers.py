@@ -1,17 +1,20 @@
+import asyncio
 import logging
+from html import escape
 from telegram import Update
 from telegram.ext import CallbackContext
 
-from game.game_logic import GameLogic
-from database.db_manager import DatabaseManager
+from handlers.game_handlers import GameHandlers, get_chat_lock
 from utils.message_formatter import MessageFormatter
 
 logger = logging.getLogger(__name__)
 
 class AdminHandlers:
-    def __init__(self):
-        self.game_logic = GameLogic()
-        self.db = DatabaseManager()
+    def __init__(self, game_handlers: GameHandlers):
+        # Share the game registry and chat-admin cache with GameHandlers
+        self.game_handlers = game_handlers
+        self.game_logic = self.game_handlers.game_logic
+        self.db = self.game_logic.db
         self.formatter = MessageFormatter()
         
         # List of admin user IDs (you can modify this or store in database)
@@ -23,14 +26,11 @@ class AdminHandlers:
     
     async def is_chat_admin(self, context: CallbackContext, chat_id: int, user_id: int) -> bool:
         """Check if user is admin in the chat."""
-        try:
-            chat_member = await context.bot.get_chat_member(chat_id, user_id)
-            return chat_member.status in ['administrator', 'creator']
-        except:
-            return False
+        return await self.game_handlers.is_chat_admin(context, chat_id, user_id)
     
     async def admin_panel(self, update: Update, context: CallbackContext):
         """Show admin panel with statistics."""
+        msg = update.message
         user_id = update.effective_user.id
         chat_id = update.effective_chat.id
         
@@ -39,14 +39,14 @@ class AdminHandlers:
         is_chat_admin = await self.is_chat_admin(context, chat_id, user_id)
         
         if not (is_bot_admin or is_chat_admin):
-            await update.message.reply_text("❌ You don't have admin permissions!")
+            await msg.reply_text("❌ You don't have admin permissions!")
             return
         
         # Get admin statistics
         stats = self.get_admin_stats()
         message = self.formatter.get_admin_panel_message(stats)
         
-        await update.message.reply_text(message, parse_mode='HTML')
+        await msg.reply_text(message, parse_mode='HTML')
     
     def get_admin_stats(self) -> dict:
         """Get admin statistics."""
@@ -54,26 +54,20 @@ class AdminHandlers:
         cursor = conn.cursor()
         
         try:
-            # Total games
-            cursor.execute("SELECT COUNT(*) FROM games")
-            total_games = cursor.fetchone()[0]
-            
-            # Active games
-            cursor.execute("SELECT COUNT(*) FROM games WHERE status IN ('waiting', 'discussion', 'voting')")
-            active_games = cursor.fetchone()[0]
-            
-            # Completed games
-            cursor.execute("SELECT COUNT(*) FROM games WHERE status = 'ended'")
-            completed_games = cursor.fetchone()[0]
-            
+            # Game counters (total, active, completed, today) in a single pass
+            cursor.execute("""
+                SELECT COUNT(*),
+                       COALESCE(SUM(status IN ('waiting', 'discussion', 'voting')), 0),
+                       COALESCE(SUM(status = 'ended'), 0),
+                       COALESCE(SUM(DATE(created_at) = DATE('now')), 0)
+                FROM games
+            """)
+            total_games, active_games, completed_games, games_today = cursor.fetchone()
+
             # Total players
             cursor.execute("SELECT COUNT(*) FROM players")
             total_players = cursor.fetchone()[0]
             
-            # Games today
-            cursor.execute("SELECT COUNT(*) FROM games WHERE DATE(created_at) = DATE('now')")
-            games_today = cursor.fetchone()[0]
-            
             # Most active player
             cursor.execute("""
                 SELECT first_name, username, games_played 
@@ -106,6 +100,7 @@ class AdminHandlers:
     
     async def end_game(self, update: Update, context: CallbackContext):
         """Force end current game (admin only)."""
+        msg = update.message
         user_id = update.effective_user.id
         chat_id = update.effective_chat.id
         
@@ -114,38 +109,40 @@ class AdminHandlers:
         is_chat_admin = await self.is_chat_admin(context, chat_id, user_id)
         
         if not (is_bot_admin or is_chat_admin):
-            await update.message.reply_text("❌ You don't have admin permissions!")
+            await msg.reply_text("❌ You don't have admin permissions!")
             return
         
-        # Get active game
-        game = self.game_logic.get_active_game_by_chat(chat_id)
-        
-        if not game:
-            await update.message.reply_text("❌ No active game found!")
-            return
-        
-        # Force end the game
-        success = self.game_logic.cancel_game(game['game_id'])
-        
-        if success:
-            await update.message.reply_text(
-                "🔨 Game forcefully ended by admin!\n"
-                "Use /newgame to start a new game."
-            )
-        else:
-            await update.message.reply_text("❌ Failed to end game!")
+        async with get_chat_lock(context):
+            # Get active game
+            game = self.game_logic.get_active_game_by_chat(chat_id)
+            
+            if not game:
+                await msg.reply_text("❌ No active game found!")
+                return
+            
+            # Force end the game
+            success = self.game_logic.cancel_game(game['game_id'])
+            
+            if success:
+                await msg.reply_text(
+                    "🔨 Game forcefully ended by admin!\n"
+                    "Use /newgame to start a new game."
+                )
+            else:
+                await msg.reply_text("❌ Failed to end game!")
     
     async def reset_player_stats(self, update: Update, context: CallbackContext):
         """Reset a player's statistics (bot admin only)."""
+        msg = update.message
         user_id = update.effective_user.id
         
         if not self.is_admin(user_id):
-            await update.message.reply_text("❌ This command is only available to bot administrators!")
+            await msg.reply_text("❌ This command is only available to bot administrators!")
             return
         
         # Get target user ID from command arguments
         if not context.args:
-            await update.message.reply_text(
+            await msg.reply_text(
                 "Usage: /resetstats <user_id>\n"
                 "Example: /resetstats 123456789"
             )
@@ -154,16 +151,16 @@ class AdminHandlers:
         try:
             target_user_id = int(context.args[0])
         except ValueError:
-            await update.message.reply_text("❌ Invalid user ID!")
+            await msg.reply_text("❌ Invalid user ID!")
             return
         
         # Reset stats
         success = self.reset_user_stats(target_user_id)
         
         if success:
-            await update.message.reply_text(f"✅ Stats reset for user ID: {target_user_id}")
+            await msg.reply_text(f"✅ Stats reset for user ID: {target_user_id}")
         else:
-            await update.message.reply_text("❌ Failed to reset stats or user not found!")
+            await msg.reply_text("❌ Failed to reset stats or user not found!")
     
     def reset_user_stats(self, user_id: int) -> bool:
         """Reset user statistics."""
@@ -194,14 +191,15 @@ class AdminHandlers:
     
     async def broadcast_message(self, update: Update, context: CallbackContext):
         """Broadcast message to all players (bot admin only)."""
+        msg = update.message
         user_id = update.effective_user.id
         
         if not self.is_admin(user_id):
-            await update.message.reply_text("❌ This command is only available to bot administrators!")
+            await msg.reply_text("❌ This command is only available to bot administrators!")
             return
         
         if not context.args:
-            await update.message.reply_text(
+            await msg.reply_text(
                 "Usage: /broadcast <message>\n"
                 "Example: /broadcast Server maintenance in 10 minutes!"
             )
@@ -217,21 +215,26 @@ class AdminHandlers:
         
         try:
             cursor.execute("SELECT user_id FROM players")
-            players = cursor.fetchall()
+            user_ids = [row[0] for row in cursor.fetchall()]
             
-            for player in players:
-                try:
-                    await context.bot.send_message(
-                        chat_id=player[0],
-                        text=f"📢 <b>Broadcast from Bot Admin:</b>\n\n{message}",
-                        parse_mode='HTML'
-                    )
-                    success_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to send broadcast to {player[0]}: {e}")
+            # Send concurrently; the application's rate limiter paces the requests
+            text = f"📢 <b>Broadcast from Bot Admin:</b>\n\n{message}"
+            results = await asyncio.gather(
+                *[
+                    context.bot.send_message(chat_id=player_id, text=text, parse_mode='HTML')
+                    for player_id in user_ids
+                ],
+                return_exceptions=True
+            )
+            
+            for player_id, result in zip(user_ids, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to send broadcast to {player_id}: {result}")
                     fail_count += 1
+                else:
+                    success_count += 1
             
-            await update.message.reply_text(
+            await msg.reply_text(
                 f"📢 Broadcast sent!\n"
                 f"✅ Success: {success_count}\n"
                 f"❌ Failed: {fail_count}"
@@ -239,16 +242,17 @@ class AdminHandlers:
             
         except Exception as e:
             logger.error(f"Error broadcasting message: {e}")
-            await update.message.reply_text("❌ Failed to broadcast message!")
+            await msg.reply_text("❌ Failed to broadcast message!")
         finally:
             conn.close()
     
     async def cleanup_old_games(self, update: Update, context: CallbackContext):
         """Clean up old completed games (bot admin only)."""
+        msg = update.message
         user_id = update.effective_user.id
         
         if not self.is_admin(user_id):
-            await update.message.reply_text("❌ This command is only available to bot administrators!")
+            await msg.reply_text("❌ This command is only available to bot administrators!")
             return
         
         conn = self.db.get_connection()
@@ -274,7 +278,7 @@ class AdminHandlers:
             
             conn.commit()
             
-            await update.message.reply_text(
+            await msg.reply_text(
                 f"🧹 Cleanup completed!\n"
                 f"🗑️ Deleted {deleted_games} old games\n"
                 f"🗑️ Cleaned {deleted_participants} orphaned records"
@@ -282,16 +286,17 @@ class AdminHandlers:
             
         except Exception as e:
             logger.error(f"Error cleaning up games: {e}")
-            await update.message.reply_text("❌ Failed to cleanup games!")
+            await msg.reply_text("❌ Failed to cleanup games!")
         finally:
             conn.close()
     
     async def view_logs(self, update: Update, context: CallbackContext):
         """View recent game logs (bot admin only)."""
+        msg = update.message
         user_id = update.effective_user.id
         
         if not self.is_admin(user_id):
-            await update.message.reply_text("❌ This command is only available to bot administrators!")
+            await msg.reply_text("❌ This command is only available to bot administrators!")
             return
         
         try:
@@ -307,21 +312,21 @@ class AdminHandlers:
                 if len(recent_logs) > max_length:
                     chunks = [recent_logs[i:i+max_length] for i in range(0, len(recent_logs), max_length)]
                     for i, chunk in enumerate(chunks[:3]):  # Max 3 chunks
-                        await update.message.reply_text(
+                        await msg.reply_text(
                             f"📋 <b>Recent Logs ({i+1}/{len(chunks)}):</b>\n\n"
-                            f"<code>{chunk}</code>",
+                            f"<code>{escape(chunk)}</code>",
                             parse_mode='HTML'
                         )
                 else:
-                    await update.message.reply_text(
-                        f"📋 <b>Recent Logs:</b>\n\n<code>{recent_logs}</code>",
+                    await msg.reply_text(
+                        f"📋 <b>Recent Logs:</b>\n\n<code>{escape(recent_logs)}</code>",
                         parse_mode='HTML'
                     )
             else:
-                await update.message.reply_text("📋 No logs found!")
+                await msg.reply_text("📋 No logs found!")
                 
         except FileNotFoundError:
-            await update.message.reply_text("📋 Log file not found!")
+            await msg.reply_text("📋 Log file not found!")
         except Exception as e:
             logger.error(f"Error reading logs: {e}")
-            await update.message.reply_text("❌ Failed to read logs!")
\ No newline at end of file
+            await msg.reply_text("❌ Failed to read logs!")
\ No newline at end of file
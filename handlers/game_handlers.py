@@ -1,218 +1,288 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import re
+import time
+from telegram import Update
+from telegram.error import BadRequest, NetworkError, TimedOut
 from telegram.ext import CallbackContext
 
-from game.game_logic import GameLogic
-from database.db_manager import DatabaseManager
+from game.game_logic import GameLogic, DISCUSSION_TIME, VOTING_TIME
 from utils.message_formatter import MessageFormatter
 from utils.keyboards import KeyboardBuilder
 
 logger = logging.getLogger(__name__)
 
+# Seconds a chat-admin lookup is reused before asking Telegram again
+CHAT_ADMIN_CACHE_TTL = 60
+
+# Vote button data: vote_<voted_for_id>_<game_id> (game ids contain '_' themselves)
+VOTE_CALLBACK_RE = re.compile(r'^vote_(\d+)_(.+)$')
+
+def get_chat_lock(context: CallbackContext) -> asyncio.Lock:
+    """Get the lock that serializes game changes within the update's chat.
+    
+    Updates run concurrently, so it lives in chat_data next to the chat it guards.
+    """
+    lock = context.chat_data.get('game_lock')
+    if lock is None:
+        lock = context.chat_data['game_lock'] = asyncio.Lock()
+    return lock
+
 class GameHandlers:
     def __init__(self):
         self.game_logic = GameLogic()
-        self.db = DatabaseManager()
+        self.db = self.game_logic.db
         self.formatter = MessageFormatter()
         self.keyboard_builder = KeyboardBuilder()
         
-        # Track active timers
-        self.discussion_timers = {}
-        self.voting_timers = {}
+        # Pre-render messages that take no (or only a few fixed) inputs
+        self._welcome_message = self.formatter.get_welcome_message()
+        self._help_message = self.formatter.get_help_message()
+        self._voting_started_message = self.formatter.get_voting_started_message()
+        self._spy_role_message = self.formatter.get_spy_role_message()
+        self._game_started_messages = {
+            n: self.formatter.get_game_started_message(n) for n in range(3, 9)
+        }
+        
+        # Recent get_chat_member answers: (chat_id, user_id) -> (is_admin, expires_at)
+        self.chat_admin_cache = {}
+        
+        # Fire-and-forget tasks (kept referenced until they finish)
+        self.background_tasks = set()
+        
+        # Inline button handlers by callback data prefix
+        self.callback_routes = {
+            'join': self.handle_join_button,
+            'vote': self.handle_vote_button,
+        }
     
     async def start(self, update: Update, context: CallbackContext):
         """Start command - welcome message."""
-        message = self.formatter.get_welcome_message()
-        await update.message.reply_text(message, parse_mode='HTML')
+        await update.message.reply_text(
+            self._welcome_message, parse_mode='HTML', disable_web_page_preview=True
+        )
     
     async def help_command(self, update: Update, context: CallbackContext):
         """Help command - show available commands."""
-        message = self.formatter.get_help_message()
-        await update.message.reply_text(message, parse_mode='HTML')
+        await update.message.reply_text(
+            self._help_message, parse_mode='HTML', disable_web_page_preview=True
+        )
     
     async def new_game(self, update: Update, context: CallbackContext):
         """Create a new game."""
-        chat_id = update.effective_chat.id
+        msg = update.message
+        chat = update.effective_chat
+        chat_id = chat.id
         user = update.effective_user
         
         # Check if it's a group chat
-        if update.effective_chat.type == 'private':
-            await update.message.reply_text(
+        if chat.type == 'private':
+            await msg.reply_text(
                 "❌ This game can only be played in groups!\n"
                 "Add me to a group and try again."
             )
             return
         
-        # Try to create new game
-        game_id = self.game_logic.create_game(chat_id)
-        
-        if not game_id:
-            await update.message.reply_text(
-                "❌ There's already an active game in this chat!\n"
-                "Use /cancel to cancel the current game first."
-            )
-            return
-        
-        # Auto-join the creator
-        success = self.game_logic.join_game(
-            game_id, 
-            user.id, 
-            user.username, 
-            user.first_name, 
-            user.last_name
-        )
-        
-        if success:
-            message = self.formatter.get_new_game_message(user.first_name)
-            keyboard = self.keyboard_builder.get_join_game_keyboard()
+        async with get_chat_lock(context):
+            # Try to create new game
+            game_id = self.game_logic.create_game(chat_id)
             
-            await update.message.reply_text(
-                message, 
-                reply_markup=keyboard, 
-                parse_mode='HTML'
+            if not game_id:
+                await msg.reply_text(
+                    "❌ There's already an active game in this chat!\n"
+                    "Use /cancel to cancel the current game first."
+                )
+                return
+            
+            # Auto-join the creator
+            success = self.game_logic.join_game(
+                game_id, 
+                user.id, 
+                user.username, 
+                user.first_name, 
+                user.last_name
             )
-        else:
-            await update.message.reply_text("❌ Failed to create game. Try again.")
+            
+            if success:
+                message = self.formatter.get_new_game_message(user.first_name)
+                keyboard = self.keyboard_builder.get_join_game_keyboard()
+                
+                await msg.reply_text(
+                    message, 
+                    reply_markup=keyboard, 
+                    parse_mode='HTML'
+                )
+            else:
+                await msg.reply_text("❌ Failed to create game. Try again.")
     
     async def join_game(self, update: Update, context: CallbackContext):
         """Join an existing game."""
+        msg = update.message
         chat_id = update.effective_chat.id
         user = update.effective_user
         
-        # Get active game
-        game = self.game_logic.get_active_game_by_chat(chat_id)
-        
-        if not game:
-            await update.message.reply_text(
-                "❌ No active game found!\n"
-                "Use /newgame to start a new game."
-            )
-            return
-        
-        if game['status'] != 'waiting':
-            await update.message.reply_text(
-                "❌ Game has already started!\n"
-                "Wait for the current game to finish."
-            )
-            return
-        
-        # Try to join
-        success = self.game_logic.join_game(
-            game['game_id'],
-            user.id,
-            user.username,
-            user.first_name,
-            user.last_name
-        )
-        
-        if success:
-            # Get updated game info
-            updated_game = self.game_logic.get_game_info(game['game_id'])
-            message = self.formatter.get_player_joined_message(
-                user.first_name, 
-                len(updated_game['players'])
-            )
-            await update.message.reply_text(message, parse_mode='HTML')
-        else:
-            await update.message.reply_text(
-                "❌ Couldn't join the game!\n"
-                "You might already be in the game or it's full (max 8 players)."
+        async with get_chat_lock(context):
+            # Get active game
+            game = self.game_logic.get_active_game_by_chat(chat_id)
+            
+            if not game:
+                await msg.reply_text(
+                    "❌ No active game found!\n"
+                    "Use /newgame to start a new game."
+                )
+                return
+            
+            if game['status'] != 'waiting':
+                await msg.reply_text(
+                    "❌ Game has already started!\n"
+                    "Wait for the current game to finish."
+                )
+                return
+            
+            # Try to join
+            success = self.game_logic.join_game(
+                game['game_id'],
+                user.id,
+                user.username,
+                user.first_name,
+                user.last_name
             )
+            
+            if success:
+                # Get updated game info
+                updated_game = self.game_logic.get_game_info(game['game_id'])
+                message = self.formatter.get_player_joined_message(
+                    user.first_name, 
+                    len(updated_game['players'])
+                )
+                await msg.reply_text(message, parse_mode='HTML')
+            else:
+                await msg.reply_text(
+                    "❌ Couldn't join the game!\n"
+                    "You might already be in the game or it's full (max 8 players)."
+                )
     
     async def start_game(self, update: Update, context: CallbackContext):
         """Start the game."""
+        msg = update.message
         chat_id = update.effective_chat.id
         user = update.effective_user
         
-        # Get active game
-        game = self.game_logic.get_active_game_by_chat(chat_id)
-        
-        if not game:
-            await update.message.reply_text("❌ No active game found!")
-            return
-        
-        if game['status'] != 'waiting':
-            await update.message.reply_text("❌ Game has already started!")
-            return
-        
-        # Check if user is in the game
-        if not any(p['user_id'] == user.id for p in game['players']):
-            await update.message.reply_text("❌ You must join the game first!")
-            return
-        
-        # Check if game can start
-        can_start, message = self.game_logic.can_start_game(game['game_id'])
-        if not can_start:
-            await update.message.reply_text(f"❌ {message}")
-            return
-        
-        # Start the game
-        game_data = self.game_logic.start_game(game['game_id'])
-        
-        if not game_data:
-            await update.message.reply_text("❌ Failed to start game!")
-            return
-        
-        # Send role messages to players
-        await self.send_role_messages(context, game_data)
-        
-        # Send game started message to group
-        message = self.formatter.get_game_started_message(len(game_data['players']))
-        await update.message.reply_text(message, parse_mode='HTML')
+        async with get_chat_lock(context):
+            # Get active game
+            game = self.game_logic.get_active_game_by_chat(chat_id)
+            
+            if not game:
+                await msg.reply_text("❌ No active game found!")
+                return
+            
+            if game['status'] != 'waiting':
+                await msg.reply_text("❌ Game has already started!")
+                return
+            
+            # Check if user is in the game
+            if not any(p['user_id'] == user.id for p in game['players']):
+                await msg.reply_text("❌ You must join the game first!")
+                return
+            
+            # Check if game can start
+            can_start, message = self.game_logic.can_start_game(game['game_id'], game)
+            if not can_start:
+                await msg.reply_text(f"❌ {message}")
+                return
+            
+            # Start the game
+            game_data = self.game_logic.start_game(game['game_id'])
+            
+            if not game_data:
+                await msg.reply_text("❌ Failed to start game!")
+                return
+            
+            # Send role messages to players without holding up the group reply
+            self.run_in_background(self.send_role_messages(context, game_data))
+            
+            # Send game started message to group
+            total_players = len(game_data['players'])
+            message = self._game_started_messages.get(total_players) or \
+                self.formatter.get_game_started_message(total_players)
+            await msg.reply_text(message, parse_mode='HTML')
+            
+            # Start discussion timer
+            await self.start_discussion_timer(context, game_data['game_id'], chat_id)
+    
+    def run_in_background(self, coro):
+        """Run a coroutine as a background task and log any failure."""
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+        return task
+    
+    def _on_background_task_done(self, task: asyncio.Task):
+        """Forget a finished background task and log its exception, if any."""
+        self.background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Background task failed: {task.exception()}")
+    
+    async def send_with_retry(self, bot, chat_id: int, text: str, retries: int = 3, **kwargs):
+        """Send a message, retrying on transient network errors.
         
-        # Start discussion timer
-        await self.start_discussion_timer(context, game_data['game_id'], chat_id)
+        Flood control (RetryAfter) is already retried by the application's rate limiter.
+        """
+        for attempt in range(retries):
+            try:
+                return await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except BadRequest:
+                # Subclass of NetworkError, but retrying won't fix the request
+                raise
+            except TimedOut:
+                # The message may have been delivered anyway; don't post it twice
+                raise
+            except NetworkError:
+                if attempt == retries - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)
     
     async def send_role_messages(self, context: CallbackContext, game_data):
         """Send private messages to players about their roles."""
         spy_id = game_data['spy_id']
-        location = game_data['location']
-        
-        for player in game_data['players']:
-            user_id = player['user_id']
-            is_spy = user_id == spy_id
-            
-            try:
-                if is_spy:
-                    message = self.formatter.get_spy_role_message(location)
-                else:
-                    message = self.formatter.get_civilian_role_message(location)
-                
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text=message,
+        user_ids = [player['user_id'] for player in game_data['players']]
+        
+        # Every civilian gets the same text, so render it once per game
+        civilian_message = self.formatter.get_civilian_role_message(game_data['location'])
+        
+        # Send all DMs concurrently; one blocked user must not stop the others
+        results = await asyncio.gather(
+            *[
+                self.send_with_retry(
+                    context.bot,
+                    user_id,
+                    self._spy_role_message if user_id == spy_id else civilian_message,
                     parse_mode='HTML'
                 )
-            except Exception as e:
-                logger.error(f"Failed to send role message to user {user_id}: {e}")
+                for user_id in user_ids
+            ],
+            return_exceptions=True
+        )
+        
+        for user_id, result in zip(user_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to send role message to user {user_id}: {result}")
     
     async def start_discussion_timer(self, context: CallbackContext, game_id: str, chat_id: int):
         """Start discussion phase timer."""
-        # Cancel existing timer if any
-        if game_id in self.discussion_timers:
-            self.discussion_timers[game_id].cancel()
-        
         async def discussion_timer():
-            try:
-                # Wait for 5 minutes
-                await asyncio.sleep(300)  # 5 minutes
-                
-                # Check if game is still in discussion phase
+            # Wait out the discussion unless the game finishes early
+            if not await self.game_logic.wait_for_phase(game_id, DISCUSSION_TIME):
+                return
+            
+            async with get_chat_lock(context):
+                # Games can also be ended out of band (e.g. /endgame), so re-check
                 game = self.game_logic.get_game_info(game_id)
                 if game and game['status'] == 'discussion':
                     # Start voting phase
                     await self.start_voting_phase(context, game_id, chat_id)
-                
-            except asyncio.CancelledError:
-                pass
-            finally:
-                if game_id in self.discussion_timers:
-                    del self.discussion_timers[game_id]
-        
-        # Create and start timer task
-        self.discussion_timers[game_id] = asyncio.create_task(discussion_timer())
+        
+        self.run_in_background(discussion_timer())
     
     async def start_voting_phase(self, context: CallbackContext, game_id: str, chat_id: int):
         """Start voting phase."""
@@ -225,11 +295,10 @@ class GameHandlers:
         players_data = self.game_logic.get_voting_keyboard_data(game_id)
         keyboard = self.keyboard_builder.get_voting_keyboard(players_data, game_id)
         
-        message = self.formatter.get_voting_started_message()
-        
-        await context.bot.send_message(
-            chat_id=chat_id,
-            text=message,
+        await self.send_with_retry(
+            context.bot,
+            chat_id,
+            self._voting_started_message,
             reply_markup=keyboard,
             parse_mode='HTML'
         )
@@ -239,69 +308,68 @@ class GameHandlers:
     
     async def start_voting_timer(self, context: CallbackContext, game_id: str, chat_id: int):
         """Start voting phase timer."""
-        # Cancel existing timer if any
-        if game_id in self.voting_timers:
-            self.voting_timers[game_id].cancel()
-        
         async def voting_timer():
-            try:
-                # Wait for 30 seconds
-                await asyncio.sleep(30)
-                
-                # Check if game is still in voting phase
+            # Wait out the vote unless everyone votes or the game is cancelled
+            if not await self.game_logic.wait_for_phase(game_id, VOTING_TIME):
+                return
+            
+            async with get_chat_lock(context):
+                # Games can also be ended out of band (e.g. /endgame), so re-check
                 game = self.game_logic.get_game_info(game_id)
                 if game and game['status'] == 'voting':
                     # End voting and show results
                     await self.end_voting_phase(context, game_id, chat_id)
-                
-            except asyncio.CancelledError:
-                pass
-            finally:
-                if game_id in self.voting_timers:
-                    del self.voting_timers[game_id]
-        
-        # Create and start timer task
-        self.voting_timers[game_id] = asyncio.create_task(voting_timer())
+        
+        self.run_in_background(voting_timer())
     
     async def end_voting_phase(self, context: CallbackContext, game_id: str, chat_id: int):
         """End voting phase and show results."""
-        results = self.game_logic.calculate_results(game_id)
-        
-        if not results:
-            await context.bot.send_message(
-                chat_id=chat_id,
-                text="❌ Error calculating results!"
-            )
-            return
-        
-        # Send results message
-        message = self.formatter.get_results_message(results)
-        await context.bot.send_message(
-            chat_id=chat_id,
-            text=message,
-            parse_mode='HTML'
-        )
-        
-        # Clean up
-        self.game_logic.cleanup_game(game_id)
-        if game_id in self.voting_timers:
-            del self.voting_timers[game_id]
+        try:
+            results = self.game_logic.calculate_results(game_id)
+            
+            if not results:
+                # Don't leave the chat stuck in a vote that can't be tallied
+                game = self.game_logic.get_game_info(game_id)
+                if game and game['status'] == 'voting':
+                    self.game_logic.cancel_game(game_id)
+                await self.send_with_retry(context.bot, chat_id, "❌ Error calculating results!")
+                return
+            
+            # Send results message
+            message = self.formatter.get_results_message(results)
+            await self.send_with_retry(context.bot, chat_id, message, parse_mode='HTML')
+        finally:
+            # Clean up even if the results couldn't be calculated or delivered
+            self.game_logic.cleanup_game(game_id)
+    
+    async def reap_stale_games(self, context: CallbackContext):
+        """Job: cancel abandoned games and drop expired cached lookups."""
+        self.game_logic.reap_stale_games()
+        
+        now = time.monotonic()
+        self.chat_admin_cache = {
+            key: cached for key, cached in self.chat_admin_cache.items() if cached[1] > now
+        }
     
     async def button_callback(self, update: Update, context: CallbackContext):
         """Handle inline keyboard button presses."""
         query = update.callback_query
-        await query.answer()
-        
         data = query.data
-        user = update.effective_user
+        user = query.from_user
+        
+        # Each handler answers the query itself (a query can only be answered once)
+        handler = self.callback_routes.get(data.partition('_')[0])
+        if not handler:
+            await query.answer()
+            return
         
-        if data.startswith('join_game'):
-            await self.handle_join_button(query, user)
-        elif data.startswith('vote_'):
-            await self.handle_vote_button(query, user, context)
+        async with get_chat_lock(context):
+            await handler(query, user, context)
     
-    async def handle_join_button(self, query, user):
+    async def handle_join_button(self, query, user, context: CallbackContext):
         """Handle join game button press."""
+        # Acknowledge right away (stops the client spinner) while the join proceeds
+        self.run_in_background(query.answer())
         chat_id = query.message.chat_id
         
         # Get active game
@@ -343,152 +411,172 @@ class GameHandlers:
     
     async def handle_vote_button(self, query, user, context: CallbackContext):
         """Handle vote button press."""
-        data_parts = query.data.split('_')
-        if len(data_parts) != 3:
-            await query.answer("❌ Invalid vote data!")
+        message_obj = query.message
+        match = VOTE_CALLBACK_RE.match(query.data)
+        if not match:
+            await query.answer("❌ Invalid vote data!", cache_time=30)
             return
         
-        voted_for_id = int(data_parts[1])
-        game_id = data_parts[2]
+        voted_for_id = int(match.group(1))
+        game_id = match.group(2)
     
         # Check if game exists and is in voting phase
         game = self.game_logic.get_game_info(game_id)
         if not game or game['status'] != 'voting':
-            await query.answer("❌ Voting is not active!")
+            await query.answer("❌ Voting is not active!", cache_time=30)
             return
         
+        user_id = user.id
+        voter_key = str(user_id)
+        players = game['players']
+        players_by_id = {p['user_id']: p for p in players}
+        
         # Check if user is in the game
-        if not any(p['user_id'] == user.id for p in game['players']):
-            await query.answer("❌ You're not in this game!")
+        if user_id not in players_by_id:
+            await query.answer("❌ You're not in this game!", cache_time=30)
+            return
+        
+        # Reject forged targets here rather than after a database round trip
+        voted_player = players_by_id.get(voted_for_id)
+        if not voted_player:
+            await query.answer("❌ Invalid vote data!", cache_time=30)
             return
     
         # Check if user already voted - FIX: Use correct key name
         votes = game.get('votes', {})
-        if str(user.id) in votes:
-            await query.answer("❌ You have already voted!")
+        if voter_key in votes:
+            await query.answer("❌ You have already voted!", cache_time=30)
             return
         
         # Cast vote
-        success = self.game_logic.cast_vote(game_id, user.id, voted_for_id)
+        success = self.game_logic.cast_vote(game_id, user_id, voted_for_id)
         
         if not success:
             await query.answer("❌ Couldn't cast your vote!")
             return
         
-        # Get voted player name - Get fresh game data after vote
-        updated_game = self.game_logic.get_game_info(game_id)
-        voted_player = next(
-            (p for p in updated_game['players'] if p['user_id'] == voted_for_id), 
-            None
-        )
-        
-        voted_name = voted_player['first_name'] if voted_player else "Unknown"
+        # Players are fixed once the game starts, so the data read above plus
+        # this vote is current - no need to fetch the game again
+        votes = {**votes, voter_key: voted_for_id}
+        voted_name = voted_player['first_name']
         
-        await query.answer(f"✅ You voted for {voted_name}!")
-        
-        # Send confirmation message to the chat
-        await context.bot.send_message(
-            chat_id=query.message.chat_id,
-            text=f"✅ {user.first_name} voted for {voted_name}!"
-        )
+        # Send the confirmation alongside the message edit/tally instead of before it
+        self.run_in_background(query.answer(f"✅ You voted for {voted_name}!", cache_time=5))
+
+        # Update the voting message in place instead of posting a new message per vote
+        voter_names = [p['first_name'] for p in players if str(p['user_id']) in votes]
+        message = self.formatter.get_voting_progress_message(voter_names, len(players))
+        try:
+            await query.edit_message_text(
+                message,
+                reply_markup=message_obj.reply_markup,
+                parse_mode='HTML'
+            )
+        except Exception as e:
+            logger.error(f"Failed to update voting message for game {game_id}: {e}")
 
-        # Check if all players have voted - use fresh game data
+        # Check if all players have voted
         if self.game_logic.check_all_voted(game_id):
-            # Cancel voting timer
-            if game_id in self.voting_timers:
-                self.voting_timers[game_id].cancel()
+            # Stop the voting timer
+            self.game_logic.finish_phase(game_id)
             
             # End voting immediately
-            await self.end_voting_phase(context, game_id, query.message.chat_id)
+            await self.end_voting_phase(context, game_id, message_obj.chat_id)
     
     async def show_players(self, update: Update, context: CallbackContext):
         """Show current players in the game."""
+        msg = update.message
         chat_id = update.effective_chat.id
         
         game = self.game_logic.get_active_game_by_chat(chat_id)
         
         if not game:
-            await update.message.reply_text("❌ No active game found!")
+            await msg.reply_text("❌ No active game found!")
             return
         
         message = self.formatter.get_current_players_message(game)
-        await update.message.reply_text(message, parse_mode='HTML')
+        await msg.reply_text(message, parse_mode='HTML')
     
     async def show_leaderboard(self, update: Update, context: CallbackContext):
         """Show leaderboard."""
+        msg = update.message
         leaderboard = self.db.get_leaderboard(10)
         
         if not leaderboard:
-            await update.message.reply_text(
+            await msg.reply_text(
                 "📊 No games played yet!\n"
                 "Start playing to see the leaderboard."
             )
             return
         
         message = self.formatter.get_leaderboard_message(leaderboard)
-        await update.message.reply_text(message, parse_mode='HTML')
+        await msg.reply_text(message, parse_mode='HTML')
     
     async def show_stats(self, update: Update, context: CallbackContext):
         """Show individual player stats."""
+        msg = update.message
         user_id = update.effective_user.id
         stats = self.db.get_player_stats(user_id)
         
         if not stats:
-            await update.message.reply_text(
+            await msg.reply_text(
                 "📊 You haven't played any games yet!\n"
                 "Use /newgame to start your first game."
             )
             return
         
         message = self.formatter.get_player_stats_message(stats)
-        await update.message.reply_text(message, parse_mode='HTML')
+        await msg.reply_text(message, parse_mode='HTML')
     
     async def cancel_game(self, update: Update, context: CallbackContext):
         """Cancel current game."""
+        msg = update.message
         chat_id = update.effective_chat.id
         user = update.effective_user
         
-        game = self.game_logic.get_active_game_by_chat(chat_id)
-        
-        if not game:
-            await update.message.reply_text("❌ No active game found!")
-            return
+        async with get_chat_lock(context):
+            game = self.game_logic.get_active_game_by_chat(chat_id)
+            
+            if not game:
+                await msg.reply_text("❌ No active game found!")
+                return
+            
+            # Check if user is in the game or is admin (only ask Telegram if needed)
+            user_in_game = any(p['user_id'] == user.id for p in game['players'])
+            
+            if not user_in_game and not await self.is_chat_admin(context, chat_id, user.id):
+                await msg.reply_text(
+                    "❌ Only players in the game or group admins can cancel the game!"
+                )
+                return
+            
+            # Cancel the game
+            success = self.game_logic.cancel_game(game['game_id'])
+            
+            if success:
+                await msg.reply_text(
+                    "🚫 Game cancelled successfully!\n"
+                    "Use /newgame to start a new game."
+                )
+            else:
+                await msg.reply_text("❌ Failed to cancel game!")
+    
+    async def is_chat_admin(self, context: CallbackContext, chat_id: int, user_id: int) -> bool:
+        """Check if user is admin in the chat, caching the answer briefly."""
+        key = (chat_id, user_id)
+        cached = self.chat_admin_cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
         
-        # Check if user is in the game or is admin
-        is_admin = False
         try:
-            chat_member = await context.bot.get_chat_member(chat_id, user.id)
+            chat_member = await context.bot.get_chat_member(chat_id, user_id)
             is_admin = chat_member.status in ['administrator', 'creator']
-        except:
-            pass
+        except Exception as e:
+            logger.warning(f"Failed to get chat member {user_id} in chat {chat_id}: {e}")
+            return False
         
-        user_in_game = any(p['user_id'] == user.id for p in game['players'])
-        
-        if not (is_admin or user_in_game):
-            await update.message.reply_text(
-                "❌ Only players in the game or group admins can cancel the game!"
-            )
-            return
-        
-        # Cancel the game
-        success = self.game_logic.cancel_game(game['game_id'])
-        
-        if success:
-            # Cancel any running timers
-            if game['game_id'] in self.discussion_timers:
-                self.discussion_timers[game['game_id']].cancel()
-                del self.discussion_timers[game['game_id']]
-            
-            if game['game_id'] in self.voting_timers:
-                self.voting_timers[game['game_id']].cancel()
-                del self.voting_timers[game['game_id']]
-            
-            await update.message.reply_text(
-                "🚫 Game cancelled successfully!\n"
-                "Use /newgame to start a new game."
-            )
-        else:
-            await update.message.reply_text("❌ Failed to cancel game!")
+        self.chat_admin_cache[key] = (is_admin, time.monotonic() + CHAT_ADMIN_CACHE_TTL)
+        return is_admin
     
     async def error_handler(self, update: Update, context: CallbackContext):
         """Handle errors."""
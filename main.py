@@ -1,8 +1,12 @@
 import os
+import asyncio
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from dotenv import load_dotenv
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters
+from telegram.ext import AIORateLimiter, Application, CommandHandler, CallbackQueryHandler
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -11,23 +15,47 @@ from handlers.game_handlers import GameHandlers
 from handlers.admin_handlers import AdminHandlers
 from database.db_manager import DatabaseManager
 
+# Use the faster libuv-based event loop when it's installed (not on Windows;
+# set via the loop policy, since uvloop.install() is deprecated on 3.12+)
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
 # Load environment variables
 load_dotenv()
 
 # Create logs directory if it doesn't exist
 os.makedirs('logs', exist_ok=True)
 
-# Enable logging
+# Enable logging. Handlers only enqueue records; a listener thread does the
+# file/console writes so logging never blocks the event loop.
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [
+    RotatingFileHandler('logs/bot.log', maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8'),
+    logging.StreamHandler()
+]
+for log_handler in log_handlers:
+    log_handler.setFormatter(log_formatter)
+
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    format='%(message)s',  # full formatting happens in the listener's handlers
     level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
-    handlers=[
-        logging.FileHandler('logs/bot.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(log_queue)]
 )
 logger = logging.getLogger(__name__)
 
+# Library loggers are chatty at INFO (httpx logs every Bot API request), so
+# only let their warnings through
+for noisy_logger in ('httpx', 'telegram', 'apscheduler'):
+    logging.getLogger(noisy_logger).setLevel(logging.WARNING)
+
 def main():
     """Start the bot."""
     # Get bot token from environment
@@ -44,12 +72,27 @@ def main():
         db_manager.init_db()
         logger.info("Database initialized successfully")
 
-        # Create the Application
-        application = Application.builder().token(TOKEN).build()
+        # Create the Application; updates from different chats are handled
+        # concurrently, GameHandlers serializes changes within a chat.
+        # The connection pool is sized for the role-DM fan-out at game start,
+        # and the rate limiter paces that fan-out under Telegram's flood limits.
+        application = (
+            Application.builder()
+            .token(TOKEN)
+            .concurrent_updates(True)
+            .connection_pool_size(64)
+            .connect_timeout(10)
+            .read_timeout(30)
+            .write_timeout(30)
+            .pool_timeout(5)
+            .get_updates_read_timeout(60)
+            .rate_limiter(AIORateLimiter(overall_max_rate=30, overall_time_period=1, max_retries=3))
+            .build()
+        )
         
         # Initialize handlers
         game_handlers = GameHandlers()
-        admin_handlers = AdminHandlers()
+        admin_handlers = AdminHandlers(game_handlers)
         
         # Set admin IDs from environment
         admin_ids_str = os.getenv('ADMIN_IDS', '')
@@ -82,12 +125,38 @@ def main():
         # Callback query handler for inline keyboards
         application.add_handler(CallbackQueryHandler(game_handlers.button_callback))
         
+        # Periodically cancel abandoned games (needs the job-queue extra)
+        if application.job_queue:
+            application.job_queue.run_repeating(game_handlers.reap_stale_games, interval=300, first=300)
+        else:
+            logger.warning("JobQueue not available, stale games will not be reaped")
+        
         # Error handler
         application.add_error_handler(game_handlers.error_handler)
         
-        # Start the Bot
-        logger.info("Starting bot...")
-        application.run_polling(allowed_updates=["message", "callback_query"])
+        # Start the Bot: webhook when a public host is configured, else polling
+        public_host = os.getenv('PUBLIC_HOST')
+        if public_host:
+            logger.info(f"Starting bot with webhook on {public_host}...")
+            application.run_webhook(
+                listen=os.getenv('WEBHOOK_LISTEN', '0.0.0.0'),
+                port=int(os.getenv('PORT', '8443')),
+                url_path=TOKEN,
+                webhook_url=f"https://{public_host}/{TOKEN}",
+                # Telegram echoes this in a header so forged requests get rejected
+                secret_token=os.getenv('WEBHOOK_SECRET') or None,
+                allowed_updates=["message", "callback_query"],
+                max_connections=100
+            )
+        else:
+            logger.info("Starting bot...")
+            # Long-poll: each getUpdates waits up to 50s for new updates
+            application.run_polling(
+                poll_interval=0.0,
+                timeout=50,
+                bootstrap_retries=-1,
+                allowed_updates=["message", "callback_query"]
+            )
         
     except Exception as e:
         logger.error(f"Failed to start bot: {e}")
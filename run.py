@@ -8,7 +8,6 @@ import os
 import sys
 import signal
 import logging
-from pathlib import Path
 
 def signal_handler(sig, frame):
     """Handle shutdown signals gracefully."""
@@ -24,16 +23,21 @@ def check_setup():
     if not os.path.exists('.env'):
         issues.append("❌ .env file not found. Run: python setup.py")
     
-    # Check directories
-    for directory in ['data', 'logs']:
-        if not Path(directory).exists():
+    # Check directories (one listing of the working directory)
+    entries = {entry.name for entry in os.scandir('.') if entry.is_dir()}
+    for directory in ('data', 'logs'):
+        if directory not in entries:
             issues.append(f"❌ Directory '{directory}' not found. Run: python setup.py")
     
     # Check BOT_TOKEN
     if os.path.exists('.env'):
-        with open('.env', 'r') as f:
-            content = f.read()
-            if 'BOT_TOKEN=your_bot_token_here' in content:
+        try:
+            from dotenv import dotenv_values
+        except ImportError:
+            issues.append("❌ python-dotenv not installed. Run: python setup.py")
+        else:
+            token = dotenv_values('.env').get('BOT_TOKEN')
+            if not token or token == 'your_bot_token_here':
                 issues.append("❌ BOT_TOKEN not set in .env file")
     
     return issues
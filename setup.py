@@ -8,13 +8,12 @@ import os
 import sys
 import subprocess
 import sqlite3
-from pathlib import Path
 
 def create_directories():
     """Create necessary directories."""
     directories = ['data', 'logs']
     for directory in directories:
-        Path(directory).mkdir(exist_ok=True)
+        os.makedirs(directory, exist_ok=True)
         print(f"✅ Created directory: {directory}")
 
 def check_env_file():
@@ -42,11 +41,16 @@ def check_env_file():
         print("✅ .env file exists")
         
         # Check if BOT_TOKEN is set
-        with open('.env', 'r') as env_file:
-            content = env_file.read()
-            if 'BOT_TOKEN=your_bot_token_here' in content or 'BOT_TOKEN=' in content.split('\n')[0]:
-                print("⚠️  Please set your BOT_TOKEN in .env file!")
-                return False
+        try:
+            from dotenv import dotenv_values
+        except ImportError:
+            print("⚠️  python-dotenv not installed yet, skipping BOT_TOKEN check")
+            return True
+        
+        token = dotenv_values('.env').get('BOT_TOKEN')
+        if not token or token == 'your_bot_token_here':
+            print("⚠️  Please set your BOT_TOKEN in .env file!")
+            return False
         
         print("✅ BOT_TOKEN appears to be set")
         return True
@@ -1,43 +1,31 @@
 from typing import List, Dict
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+# Markups are immutable, so the static join keyboard is built once and shared
+JOIN_GAME_KEYBOARD = InlineKeyboardMarkup(
+    ((InlineKeyboardButton("🎮 Join Game", callback_data="join_game"),),)
+)
+
 class KeyboardBuilder:
     def __init__(self):
         pass
     
     def get_join_game_keyboard(self) -> InlineKeyboardMarkup:
         """Get join game keyboard."""
-        keyboard = [
-            [InlineKeyboardButton("🎮 Join Game", callback_data="join_game")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return JOIN_GAME_KEYBOARD
     
     def get_voting_keyboard(self, players_data: List[Dict], game_id: str) -> InlineKeyboardMarkup:
         """Get voting keyboard with all players."""
-        keyboard = []
-        
-        # Create buttons for each player (2 per row)
-        for i in range(0, len(players_data), 2):
-            row = []
-            
-            # First player in row
-            player1 = players_data[i]
-            button1 = InlineKeyboardButton(
-                f"🗳️ {player1['display_name']}", 
-                callback_data=f"vote_{player1['user_id']}_{game_id}"
+        buttons = [
+            InlineKeyboardButton(
+                f"🗳️ {player['display_name']}", 
+                callback_data=f"vote_{player['user_id']}_{game_id}"
             )
-            row.append(button1)
-            
-            # Second player in row (if exists)
-            if i + 1 < len(players_data):
-                player2 = players_data[i + 1]
-                button2 = InlineKeyboardButton(
-                    f"🗳️ {player2['display_name']}", 
-                    callback_data=f"vote_{player2['user_id']}_{game_id}"
-                )
-                row.append(button2)
-            
-            keyboard.append(row)
+            for player in players_data
+        ]
+        
+        # 2 buttons per row
+        keyboard = tuple(tuple(buttons[i:i + 2]) for i in range(0, len(buttons), 2))
         
         return InlineKeyboardMarkup(keyboard)
     
@@ -1,4 +1,30 @@
-from typing import List, Dict, Optional
+from functools import lru_cache
+from html import escape
+from typing import List, Dict
+
+from game.game_logic import DISCUSSION_TIME, VOTING_TIME
+
+@lru_cache(maxsize=1024)
+def escape_name(name: str) -> str:
+    """Escape a user-supplied name for HTML messages (cached per name)."""
+    return escape(name or "")
+
+def format_duration(seconds: int) -> str:
+    """Render a phase length for messages, e.g. '5 minutes' or '30 seconds'."""
+    if seconds % 60 == 0:
+        minutes = seconds // 60
+        return f"{minutes} minute{'s' if minutes != 1 else ''}"
+    return f"{seconds} second{'s' if seconds != 1 else ''}"
+
+# Static footer of the admin panel
+ADMIN_COMMANDS_TEXT = (
+    "🛠️ <b>Admin Commands:</b>\n"
+    "/endgame - Force end current game\n"
+    "/resetstats &lt;user_id&gt; - Reset player stats\n"
+    "/broadcast &lt;message&gt; - Send message to all players\n"
+    "/cleanup - Clean up old games\n"
+    "/logs - View recent game logs"
+)
 
 class MessageFormatter:
     def __init__(self):
@@ -25,7 +51,7 @@ class MessageFormatter:
             f"• One player is secretly chosen as the SPY\n"
             f"• All civilians get the same location\n"
             f"• The spy doesn't know the location\n"
-            f"• Discuss for 5 minutes to figure out who's the spy\n"
+            f"• Discuss for {format_duration(DISCUSSION_TIME)} to figure out who's the spy\n"
             f"• Vote to eliminate someone!\n\n"
             f"🏆 <b>Win conditions:</b>\n"
             f"• Civilians win if they vote out the spy\n"
@@ -55,15 +81,15 @@ class MessageFormatter:
             f"• Game needs 3-8 players\n"
             f"• Works only in group chats\n"
             f"• You'll get a private message with your role\n"
-            f"• Discussion time: 5 minutes\n"
-            f"• Voting time: 30 seconds"
+            f"• Discussion time: {format_duration(DISCUSSION_TIME)}\n"
+            f"• Voting time: {format_duration(VOTING_TIME)}"
         )
     
     def get_new_game_message(self, creator_name: str) -> str:
         """Get new game created message."""
         return (
             f"{self.emojis['game']} <b>New Spy Game Created!</b>\n\n"
-            f"🎮 Created by: {creator_name}\n"
+            f"🎮 Created by: {escape_name(creator_name)}\n"
             f"{self.emojis['players']} Players: 1/8\n\n"
             f"Click the button below to join!\n"
             f"Need 3-8 players to start the game."
@@ -73,7 +99,7 @@ class MessageFormatter:
         """Get player joined message."""
         ready_msg = "🎯 Ready to start! Use /startgame" if total_players >= 3 else f"Need {3 - total_players} more players to start."
         return (
-            f"✅ <b>{player_name}</b> joined the game!\n"
+            f"✅ <b>{escape_name(player_name)}</b> joined the game!\n"
             f"{self.emojis['players']} Players: {total_players}/8\n\n"
             f"{ready_msg}"
         )
@@ -84,7 +110,7 @@ class MessageFormatter:
         message += f"{self.emojis['players']} <b>Players ({len(players)}/8):</b>\n"
         
         for i, player in enumerate(players, 1):
-            name = player['first_name']
+            name = escape_name(player['first_name'])
             username = f"@{player['username']}" if player['username'] else ""
             message += f"{i}. {name} {username}\n"
         
@@ -105,14 +131,14 @@ class MessageFormatter:
             f"{self.emojis['players']} Players: {total_players}\n"
             f"{self.emojis['spy']} One of you is the SPY!\n\n"
             f"{self.emojis['discussion']} <b>Discussion Phase</b>\n"
-            f"{self.emojis['time']} Time: 5 minutes\n\n"
+            f"{self.emojis['time']} Time: {format_duration(DISCUSSION_TIME)}\n\n"
             f"💌 Check your private messages for your role!\n"
             f"🔍 Try to figure out who the spy is!\n\n"
             f"💡 <b>Tip:</b> Ask questions about the location!"
         )
     
-    def get_spy_role_message(self, location: str) -> str:
-        """Get spy role private message."""
+    def get_spy_role_message(self) -> str:
+        """Get spy role private message (the same text for every game)."""
         return (
             f"{self.emojis['spy']} <b>You are the SPY!</b>\n\n"
             f"🎯 <b>Your mission:</b>\n"
@@ -148,15 +174,25 @@ class MessageFormatter:
         """Get voting phase started message."""
         return (
             f"{self.emojis['voting']} <b>Voting Phase Started!</b>\n\n"
-            f"{self.emojis['time']} Time limit: 30 seconds\n"
+            f"{self.emojis['time']} Time limit: {format_duration(VOTING_TIME)}\n"
             f"🗳️ Vote for who you think is the SPY!\n\n"
             f"⚠️ <b>Important:</b>\n"
-            f"• You must vote within 30 seconds\n"
+            f"• You must vote within {format_duration(VOTING_TIME)}\n"
             f"• Player with most votes gets eliminated\n"
             f"• If all players vote early, voting ends immediately\n\n"
             f"Choose wisely! 👇"
         )
     
+    def get_voting_progress_message(self, voter_names: List[str], total_players: int) -> str:
+        """Get voting message with the tally of players who already voted."""
+        message = self.get_voting_started_message()
+        message += f"\n\n📥 <b>Votes ({len(voter_names)}/{total_players}):</b>\n"
+        
+        for name in voter_names:
+            message += f"✅ {escape_name(name)} voted\n"
+        
+        return message
+    
     def get_results_message(self, results: Dict) -> str:
         """Get game results message."""
         winner = results['winner']
@@ -178,7 +214,7 @@ class MessageFormatter:
         
         # Reveal spy
         if spy_player:
-            spy_name = spy_player['first_name']
+            spy_name = escape_name(spy_player['first_name'])
             message += f"{self.emojis['spy']} <b>The Spy was:</b> {spy_name}\n"
         
         # Reveal location
@@ -186,25 +222,18 @@ class MessageFormatter:
         
         # Voting results
         if total_votes > 0 and eliminated_player:
-            eliminated_name = eliminated_player['first_name']
+            eliminated_name = escape_name(eliminated_player['first_name'])
             message += f"🗳️ <b>Voting Results:</b>\n"
             message += f"❌ <b>Eliminated:</b> {eliminated_name}\n"
             message += f"📊 <b>Vote breakdown:</b>\n"
             
-            # Sort vote counts by votes received
-            sorted_votes = sorted(vote_counts.items(), key=lambda x: x[1], reverse=True)
-            
-            for player_id, votes in sorted_votes:
-                # Find player name
-                player = None
-                if spy_player and spy_player['user_id'] == player_id:
-                    player = spy_player
-                elif eliminated_player and eliminated_player['user_id'] == player_id:
-                    player = eliminated_player
-                
-                if player:
-                    player_name = player['first_name']
-                    message += f"  • {player_name}: {votes} votes\n"
+            # vote_counts is already ordered by votes received
+            names = {p['user_id']: p['first_name'] for p in results['players']}
+            message += "".join(
+                f"  • {escape_name(names[player_id])}: {votes} votes\n"
+                for player_id, votes in vote_counts.items()
+                if player_id in names
+            )
             
             message += f"\n📈 Total votes cast: {total_votes}\n"
         else:
@@ -224,7 +253,7 @@ class MessageFormatter:
         message += f"👥 Players ({len(players)}/8):\n\n"
         
         for i, player in enumerate(players, 1):
-            name = player['first_name']
+            name = escape_name(player['first_name'])
             username = f"@{player['username']}" if player['username'] else ""
             message += f"{i}. {name} {username}\n"
         
@@ -245,7 +274,7 @@ class MessageFormatter:
         message = f"{self.emojis['leaderboard']} <b>Leaderboard - Top Players</b>\n\n"
         
         for i, player in enumerate(leaderboard, 1):
-            name = player['first_name']
+            name = escape_name(player['first_name'])
             username = f"@{player['username']}" if player['username'] else ""
             games_played = player['games_played']
             games_won = player['games_won']
@@ -270,7 +299,7 @@ class MessageFormatter:
     
     def get_player_stats_message(self, stats: Dict) -> str:
         """Get individual player stats message."""
-        name = stats['first_name']
+        name = escape_name(stats['first_name'])
         username = f"@{stats['username']}" if stats['username'] else ""
         
         message = f"{self.emojis['stats']} <b>Statistics for {name}</b> {username}\n\n"
@@ -329,17 +358,12 @@ class MessageFormatter:
         
         most_active = stats.get('most_active')
         if most_active:
-            name = most_active[0]
+            name = escape_name(most_active[0])
             username = f"@{most_active[1]}" if most_active[1] else ""
             games = most_active[2]
             message += f"🎮 <b>Most Active Player:</b>\n"
             message += f"   {name} {username} ({games} games)\n\n"
         
-        message += f"🛠️ <b>Admin Commands:</b>\n"
-        message += f"/endgame - Force end current game\n"
-        message += f"/resetstats <user_id> - Reset player stats\n"
-        message += f"/broadcast <message> - Send message to all players\n"
-        message += f"/cleanup - Clean up old games\n"
-        message += f"/logs - View recent game logs"
+        message += ADMIN_COMMANDS_TEXT
         
         return message